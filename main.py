@@ -3,8 +3,11 @@
 SenseVoice FastAPI WebSocket 主应用
 只包含路由定义，业务逻辑移至 server 模块
 """
+import asyncio
 import logging
+import queue
 from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 
 import uvicorn
 from fastapi import FastAPI, WebSocket
@@ -15,18 +18,29 @@ from server.sensevoice_service import SenseVoiceService
 from server.websocket_manager import WebSocketConnectionManager
 from server.websocket_handler import WebSocketHandler
 
+__all__ = ["app"]
+
 # 创建自定义日志过滤器，过滤掉WebSocket二进制和TEXT日志
 class WebSocketLogFilter(logging.Filter):
+    # 直接丢弃的WebSocket相关日志来源
+    SILENCED_PREFIXES = ("websockets", "uvicorn.websocket", "uvicorn.protocols.websockets")
+    # 帧日志模板的前缀，例如 "> %s"、"< %s"
+    FRAME_PREFIXES = (">", "<")
+
     def filter(self, record):
-        # 过滤掉包含特定内容的日志
-        if hasattr(record, 'getMessage'):
-            message = record.getMessage()
-            # 过滤掉二进制数据和WebSocket消息
-            if ('BINARY' in message or
-                'TEXT' in message or
-                message.startswith('>') or
-                message.startswith('<')):
-                return False
+        # 先按日志来源过滤，无需格式化消息
+        if record.name.startswith(self.SILENCED_PREFIXES):
+            return False
+
+        # 只检查未格式化的消息模板，避免对每条日志执行 getMessage()
+        message = record.msg
+        if not isinstance(message, str):
+            return True
+        # 过滤掉二进制数据和WebSocket消息
+        if (message.startswith(self.FRAME_PREFIXES) or
+                'BINARY' in message or
+                'TEXT' in message):
+            return False
         return True
 
 # 配置日志
@@ -53,12 +67,45 @@ loggers_to_silence = [
 for logger_name in loggers_to_silence:
     logger = logging.getLogger(logger_name)
     logger.setLevel(logging.CRITICAL)  # 只显示严重错误
+    # 不再向根日志记录器传递，跳过根处理器上的过滤器和输出
+    logger.propagate = False
+    logger.handlers = []
 
 logger = logging.getLogger(__name__)
 
 
+def start_log_listener() -> QueueListener:
+    """将根日志记录器的输出移到后台线程，写日志不再阻塞事件循环
+
+    需在 worker 进程内调用：fork 之前启动的线程在 worker 中不存在
+    """
+    log_queue = queue.SimpleQueue()
+    handlers = list(root_logger.handlers)
+    # 过滤只在 QueueHandler 上进行：入队时 prepare() 已将 record.msg 替换为
+    # 格式化后的完整消息，若在后台处理器上再次过滤会误删识别结果
+    for handler in handlers:
+        for log_filter in [f for f in handler.filters if isinstance(f, WebSocketLogFilter)]:
+            handler.removeFilter(log_filter)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(WebSocketLogFilter())
+    root_logger.handlers = [queue_handler]
+    listener.start()
+    return listener
+
+
+def stop_log_listener(listener: QueueListener):
+    """输出剩余日志并恢复同步输出"""
+    listener.stop()
+    for handler in listener.handlers:
+        handler.addFilter(WebSocketLogFilter())
+    root_logger.handlers = list(listener.handlers)
+
+
 # 全局服务实例
-sense_voice_service = None
+# 模型在导入时加载：gunicorn --preload 下只在主进程加载一次，
+# fork 出的 worker 通过写时复制共享模型内存
+sense_voice_service = SenseVoiceService()
 connection_manager = None
 websocket_handler = None
 
@@ -66,19 +113,23 @@ websocket_handler = None
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
-    global sense_voice_service, connection_manager, websocket_handler
+    global connection_manager, websocket_handler
 
     # 启动时初始化
+    log_listener = start_log_listener()
     logger.info("正在启动 SenseVoice 服务...")
-    sense_voice_service = SenseVoiceService()
     connection_manager = WebSocketConnectionManager()
     websocket_handler = WebSocketHandler(sense_voice_service, connection_manager)
+    stats_task = asyncio.create_task(connection_manager.log_stats_loop())
     logger.info("SenseVoice 服务启动完成")
 
     yield
 
     # 关闭时清理
     logger.info("正在关闭 SenseVoice 服务...")
+    stats_task.cancel()
+    sense_voice_service.shutdown()
+    stop_log_listener(log_listener)
 
 
 app = FastAPI(
@@ -148,11 +199,13 @@ async def health_check():
 
 
 if __name__ == "__main__":
+    # 直接传入 app 对象，避免 uvicorn 再次导入本模块重复加载模型；
+    # 开发时的热重载请使用 start_dev.sh
     uvicorn.run(
-        "main:app",
+        app,
         host="0.0.0.0",
         port=8891,
-        reload=True,
+        loop="auto",  # 已安装 uvloop 时使用 uvloop，Windows 上回退到 asyncio
         log_level="info",
         access_log=False  # 禁用访问日志减少噪音
     )
\ No newline at end of file
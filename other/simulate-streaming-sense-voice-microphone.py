@@ -118,6 +118,15 @@ def create_recognizer(args) -> sherpa_onnx.OfflineRecognizer:
     return recognizer
 
 
+def aligned_empty(n: int, alignment: int = 64) -> np.ndarray:
+    """Return an uninitialized float32 array whose data is
+    `alignment`-byte aligned, so SIMD kernels can use aligned loads."""
+    itemsize = np.dtype(np.float32).itemsize
+    raw = np.empty(n + alignment // itemsize, dtype=np.float32)
+    offset = (-raw.ctypes.data % alignment) // itemsize
+    return raw[offset : offset + n]
+
+
 def start_recording():
     # You can use any value you like for samples_per_read
     samples_per_read = int(0.1 * sample_rate)  # 0.1 second = 100 ms
@@ -171,7 +180,10 @@ def main():
 
     print("Started! Please speak")
 
-    buffer = []
+    # Preallocated float32 buffer with a write cursor, so that each read
+    # only copies the new samples instead of the whole utterance
+    buffer = aligned_empty(20 * sample_rate)
+    write_idx = 0
 
     global recording_thread
     recording_thread = threading.Thread(target=start_recording)
@@ -185,30 +197,52 @@ def main():
     offset = 0
     while not killed:
         samples = samples_queue.get()  # a blocking read
-
-        buffer = np.concatenate([buffer, samples])
-        while offset + window_size < len(buffer):
+        # The buffer is float32; a float64 chunk would be silently narrowed
+        # here and upcast again by anything that concatenates it later
+        assert samples.dtype == np.float32, samples.dtype
+        # Monotonic clock for interval math, read once per iteration
+        now = time.monotonic()
+
+        n = samples.shape[0]
+        if write_idx + n > buffer.shape[0]:
+            # Only happens if VAD keeps a segment open for longer than the
+            # buffer; grow geometrically so this stays amortized O(1)
+            grown = aligned_empty(max(2 * buffer.shape[0], write_idx + n))
+            np.copyto(grown[:write_idx], buffer[:write_idx])
+            buffer = grown
+        np.copyto(buffer[write_idx : write_idx + n], samples)
+        write_idx += n
+
+        while offset + window_size < write_idx:
             vad.accept_waveform(buffer[offset : offset + window_size])
             if not started and vad.is_speech_detected():
                 started = True
-                started_time = time.time()
+                started_time = now
             offset += window_size
 
         if not started:
-            if len(buffer) > 10 * window_size:
-                offset -= len(buffer) - 10 * window_size
-                buffer = buffer[-10 * window_size :]
-
-        if started and time.time() - started_time > 0.2:
+            if write_idx > 10 * window_size:
+                keep = 10 * window_size
+                offset -= write_idx - keep
+                buffer[:keep] = buffer[write_idx - keep : write_idx]
+                write_idx = keep
+
+        # SenseVoice is non-streaming, so every partial re-decodes the whole
+        # buffer. Space partials out in proportion to the buffered audio to
+        # keep the total partial cost linear in the utterance length.
+        partial_interval = max(0.2, write_idx / sample_rate * 0.3)
+        if started and now - started_time > partial_interval:
             stream = recognizer.create_stream()
-            stream.accept_waveform(sample_rate, buffer)
+            stream.accept_waveform(sample_rate, buffer[:write_idx])
             recognizer.decode_stream(stream)
             text = stream.result.text.strip()
             if text:
                 display.update_text(text)
                 display.display()
 
-            started_time = time.time()
+            # Re-read after decoding so slow decodes do not trigger
+            # back-to-back partials
+            started_time = time.monotonic()
 
         while not vad.empty():
             # In general, this while loop is executed only once
@@ -222,7 +256,7 @@ def main():
 
             display.update_text(text)
 
-            buffer = []
+            write_idx = 0
             offset = 0
             started = False
             started_time = None
@@ -3,7 +3,12 @@
 SenseVoice 服务类
 管理模型加载和识别逻辑
 """
+import asyncio
+import functools
 import logging
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional
 
@@ -20,7 +25,22 @@ class SenseVoiceService:
     def __init__(self):
         self.model_dir = Path("models")
         self.sample_rate = 16000
+        # 已释放、可复用的VAD实例；超出上限的实例直接丢弃，不长期占用内存
+        self.max_pooled_vads = 16
+        self._vad_pool = queue.Queue(maxsize=self.max_pooled_vads)
         self._initialize_models()
+        # 所有连接共享的解码线程池；多个 gunicorn worker 平分 CPU 核数，
+        # worker 数由 start_server.sh 通过 WEB_CONCURRENCY 传入
+        workers = max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, (os.cpu_count() or 1) // workers),
+            thread_name_prefix="sensevoice-decode"
+        )
+        # 实时识别微批处理：收集 batch_window 内各连接的请求合并解码
+        self.batch_window = 0.02
+        self.max_batch_size = 8
+        self._partial_queue: Optional[asyncio.Queue] = None
+        self._partial_task: Optional[asyncio.Task] = None
 
     def _initialize_models(self):
         """初始化识别器和VAD模型"""
@@ -44,7 +64,7 @@ class SenseVoiceService:
                 tokens=str(self.model_dir / "tokens.txt"),
                 language="yue",  # 设置为普通话中文，支持粤语请使用 "yue"
                 use_itn=True,
-                num_threads=2,
+                num_threads=1,  # 并行由共享线程池在请求级别提供，避免线程超额订阅
                 debug=False
             )
             logger.info("SenseVoice 模型加载成功")
@@ -63,16 +83,126 @@ class SenseVoiceService:
             logger.info("VAD 模型加载成功")
 
         except Exception as e:
-            logger.error(f"模型初始化失败: {e}")
+            logger.error("模型初始化失败: %s", e)
             raise
 
     def create_vad_instance(self):
-        """创建新的VAD实例"""
+        """获取VAD实例，优先复用已释放的实例"""
+        try:
+            return self._vad_pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        # 缓冲区只需容纳一个最长语音段加少量余量
         return sherpa_onnx.VoiceActivityDetector(
             self.vad_config,
-            buffer_size_in_seconds=100
+            buffer_size_in_seconds=int(self.vad_config.silero_vad.max_speech_duration) + 2
         )
 
+    def release_vad_instance(self, vad):
+        """连接结束后重置VAD实例并放回池中，池已满或重置失败时丢弃"""
+        try:
+            vad.reset()
+            self._vad_pool.put_nowait(vad)
+        except queue.Full:
+            pass
+        except Exception as e:
+            logger.warning("VAD实例重置失败，已丢弃: %s", e)
+
+    def decode_batch(self, waveforms: List[np.ndarray]) -> List[str]:
+        """批量识别多段音频，一次 decode_streams 调用完成解码"""
+        streams = []
+        for waveform in waveforms:
+            stream = self.recognizer.create_stream()
+            stream.accept_waveform(self.sample_rate, waveform)
+            streams.append(stream)
+
+        if streams:
+            self.recognizer.decode_streams(streams)
+        return [stream.result.text.strip() for stream in streams]
+
+    async def submit_partial(self, waveform: np.ndarray) -> str:
+        """提交实时识别请求，与其他连接的请求合并为一批解码"""
+        if self._partial_task is None or self._partial_task.done():
+            # 在事件循环中懒创建，gunicorn --preload 时主进程没有事件循环；
+            # 收集任务已结束时重新创建，旧队列中的请求不会再被处理
+            self._cancel_pending_partials()
+            self._partial_queue = asyncio.Queue()
+            self._partial_task = asyncio.create_task(self._partial_batch_loop())
+
+        future = asyncio.get_running_loop().create_future()
+        self._partial_queue.put_nowait((waveform, future))
+        return await future
+
+    async def _partial_batch_loop(self):
+        """收集短时间窗口内的实时识别请求，批量提交到线程池"""
+        loop = asyncio.get_running_loop()
+        pending = self._partial_queue
+        while True:
+            batch = [await pending.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(pending.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # 跳过已被调用方取消的请求
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+
+            # 不等待解码完成，继续收集下一批，使多个批次可以在线程池中并行
+            try:
+                decode_future = loop.run_in_executor(
+                    self.executor, self.decode_batch, [waveform for waveform, _ in batch]
+                )
+            except RuntimeError as e:
+                # 线程池已关闭，通知本批请求后继续，避免调用方永久等待
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            decode_future.add_done_callback(functools.partial(self._resolve_batch, batch))
+
+    @staticmethod
+    def _resolve_batch(batch: list, decode_future: asyncio.Future):
+        """将批量解码结果分发给各个请求"""
+        if decode_future.cancelled():
+            for _, future in batch:
+                future.cancel()
+            return
+
+        error = decode_future.exception()
+        texts = None if error is not None else decode_future.result()
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(texts[index])
+
+    def _cancel_pending_partials(self):
+        """取消队列中尚未处理的实时识别请求"""
+        if self._partial_queue is None:
+            return
+        while not self._partial_queue.empty():
+            _, future = self._partial_queue.get_nowait()
+            future.cancel()
+
+    def shutdown(self):
+        """关闭解码线程池"""
+        if self._partial_task is not None:
+            self._partial_task.cancel()
+            self._partial_task = None
+        self._cancel_pending_partials()
+        self._partial_queue = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
     def get_vad_config(self):
         """获取当前VAD配置"""
         return {
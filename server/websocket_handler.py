@@ -4,80 +4,102 @@ WebSocket 处理逻辑
 处理音频流识别的具体业务逻辑
 """
 import asyncio
-import json
 import logging
 import time
-from collections import deque
 from typing import Optional
 
 import numpy as np
+import orjson
 from fastapi import WebSocket, WebSocketDisconnect
 
 from .sensevoice_service import SenseVoiceService
-from .websocket_manager import WebSocketConnectionManager
+from .websocket_manager import ConnectionState, WebSocketConnectionManager
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 识别结果消息模板，固定字段预先序列化，只填入时间戳和文本
+# SenseVoice 暂不支持置信度，使用固定值
+_PARTIAL_TEMPLATE = '{"type":"partial","confidence":0.95,"timestamp":%.6f,"text":%s}'
+_FINAL_TEMPLATE = '{"type":"final","confidence":0.98,"segment_id":%d,"timestamp":%.6f,"text":%s}'
+# 前端发送的 pong/heartbeat 消息只含 type 和 timestamp，长度远小于该值
+_SHORT_CONTROL_MAX_LEN = 64
+_CONNECTED_JSON = orjson.dumps({
+    "type": "status",
+    "message": "Connected successfully",
+    "model_loaded": True
+}).decode()
+
 
 class AudioBuffer:
-    """环形音频缓冲区，限制最大时长，避免无限扩容"""
+    """环形音频缓冲区，预分配固定大小的 float32 数组，限制最大时长"""
 
     def __init__(self, sample_rate: int, max_duration: float):
         self.sample_rate = sample_rate
         self.max_samples = max(1, int(sample_rate * max_duration))
-        self.chunks = deque()
-        self.total_samples = 0
+        self._buf = np.zeros(self.max_samples, dtype=np.float32)
+        self._write = 0  # 下一次写入位置
+        self._filled = 0  # 有效样本数
 
     def append(self, samples: np.ndarray):
-        if not isinstance(samples, np.ndarray):
-            samples = np.asarray(samples, dtype=np.float32)
-        if samples.size == 0:
+        n = samples.shape[0]
+        if n == 0:
+            return
+
+        capacity = self.max_samples
+        if n >= capacity:
+            # 单次写入超过容量时只保留最新部分
+            np.copyto(self._buf, samples[-capacity:])
+            self._write = 0
+            self._filled = capacity
             return
-        self.chunks.append(samples)
-        self.total_samples += samples.shape[0]
-        self._trim()
 
-    def _trim(self):
-        while self.total_samples > self.max_samples and self.chunks:
-            removed = self.chunks.popleft()
-            self.total_samples -= removed.shape[0]
+        end = self._write + n
+        if end <= capacity:
+            np.copyto(self._buf[self._write:end], samples)
+        else:
+            first = capacity - self._write
+            np.copyto(self._buf[self._write:], samples[:first])
+            np.copyto(self._buf[:n - first], samples[first:])
+        self._write = end % capacity
+        self._filled = min(capacity, self._filled + n)
 
     def clear(self):
-        self.chunks.clear()
-        self.total_samples = 0
+        self._write = 0
+        self._filled = 0
 
-    def get_recent_samples(self, duration_seconds: Optional[float] = None) -> np.ndarray:
-        """获取最近一段音频数据"""
-        if self.total_samples == 0:
-            return np.array([], dtype=np.float32)
+    def resize(self, max_duration: float):
+        """调整缓冲区最大时长，保留最近的音频"""
+        max_samples = max(1, int(self.sample_rate * max_duration))
+        if max_samples == self.max_samples:
+            return
+
+        recent = self.get_recent_samples()[-max_samples:]
+        self.max_samples = max_samples
+        self._buf = np.zeros(max_samples, dtype=np.float32)
+        self._write = 0
+        self._filled = 0
+        self.append(recent)
 
-        target_samples = self.max_samples
+    def get_recent_samples(self, duration_seconds: Optional[float] = None) -> np.ndarray:
+        """获取最近一段音频数据的副本，跨越数组末尾的数据也只拷贝一次"""
+        target_samples = self._filled
         if duration_seconds is not None:
-            target_samples = min(self.total_samples, int(duration_seconds * self.sample_rate))
-        else:
-            target_samples = min(self.total_samples, target_samples)
+            target_samples = min(target_samples, int(duration_seconds * self.sample_rate))
 
         if target_samples <= 0:
             return np.array([], dtype=np.float32)
 
-        collected = []
-        remaining = target_samples
-        for chunk in reversed(self.chunks):
-            if remaining <= 0:
-                break
-            if chunk.shape[0] <= remaining:
-                collected.append(chunk)
-                remaining -= chunk.shape[0]
-            else:
-                collected.append(chunk[-remaining:])
-                remaining = 0
-
-        if not collected:
-            return np.array([], dtype=np.float32)
+        capacity = self.max_samples
+        start = (self._write - target_samples) % capacity
+        if start + target_samples <= capacity:
+            return self._buf[start:start + target_samples].copy()
 
-        collected.reverse()
-        return np.concatenate(collected).astype(np.float32, copy=False)
+        out = np.empty(target_samples, dtype=np.float32)
+        first = capacity - start
+        np.copyto(out[:first], self._buf[start:])
+        np.copyto(out[first:], self._buf[:target_samples - first])
+        return out
 
 
 class WebSocketHandler:
@@ -87,97 +109,83 @@ class WebSocketHandler:
         self.sense_voice_service = sense_voice_service
         self.connection_manager = connection_manager
         # 可调参数
-        self.recv_timeout = 2.0  # 等待音频超时时间
+        self.heartbeat_interval = 1.0  # 心跳/空闲检查间隔
         self.idle_timeout = 10.0  # 没有音频输入的断开时间
         self.ping_interval = 5.0  # 心跳间隔
         self.pong_timeout = 3.0  # 心跳响应超时
-        self.idle_sleep = 0.01  # 空闲时的让步时间
         self.partial_interval = 0.5  # 实时识别最小间隔
         self.partial_window_seconds = 2.0  # 实时识别只解码最近音频
+        self.partial_min_speech_seconds = 1.0  # 语音开始不足该时长时跳过实时识别
         self.buffer_duration_seconds = 6.0  # 最大缓冲时长
+        # 检测到语音前只保留短暂的预录音频，覆盖 VAD 判定语音开始所需的时长
+        self.preroll_seconds = 0.5
+        self.max_inbox_messages = 256  # 接收队列上限，处理跟不上时暂停读取
+        # VAD 余量与新音频的拼接暂存区，所有连接共用：
+        # _process_vad_frames 是同步函数，不会在使用期间被其他连接打断
+        self._vad_scratch = np.empty(self.sense_voice_service.window_size * 8, dtype=np.float32)
 
     async def handle_websocket_connection(self, websocket: WebSocket):
         """处理WebSocket连接"""
         connection_id = f"conn_{id(websocket)}"
+        state = None
+        vad = None
+        heartbeat_task = None
+        receive_task = None
+        partial_task = None
 
         try:
-            await self.connection_manager.connect(websocket, connection_id)
+            state = await self.connection_manager.connect(websocket, connection_id, time.monotonic())
 
             # 发送连接成功消息
-            await self.connection_manager.send_message(connection_id, {
-                "type": "status",
-                "message": "Connected successfully",
-                "model_loaded": True
-            })
+            await self.connection_manager.send_text(state, _CONNECTED_JSON)
 
             # 等待配置消息
             config_message = await websocket.receive_text()
-            config = json.loads(config_message)
+            config = orjson.loads(config_message)
 
             if config.get("type") != "config":
-                await self.connection_manager.send_message(connection_id, {
+                await self.connection_manager.send_message(state, {
                     "type": "error",
                     "message": "Missing configuration message",
                     "code": 400
                 })
+                await self.connection_manager.flush(state)
                 return
 
-            self.connection_manager.set_connection_config(connection_id, config)
-            logger.info(f"🔗 WebSocket连接建立: {connection_id}")
+            state.config = config
+            # 客户端可关闭实时识别，只接收最终结果；此时不再写入音频缓冲区
+            partial_enabled = bool(config.get("partial", True))
+            logger.info("🔗 WebSocket连接建立: %s", connection_id)
 
             vad = self.sense_voice_service.create_vad_instance()
             audio_buffer = AudioBuffer(
                 self.sense_voice_service.sample_rate,
-                self.buffer_duration_seconds
+                self.preroll_seconds
             )
             leftover = np.array([], dtype=np.float32)
             started = False
+            speech_start_time = 0.0
             segment_id = 1
             last_partial_time = 0.0
-            last_activity = time.monotonic()
-            last_audio_activity = last_activity
-            last_ping_time = 0.0
-            awaiting_pong = False
+            # 心跳与空闲检测由独立任务负责，接收时无需为每条消息设置超时；
+            # 超时后该任务关闭连接，receive() 随即收到断开消息
+            heartbeat_task = asyncio.create_task(self._heartbeat_loop(state))
+            # 独立任务接收消息放入队列，处理循环可一次取出所有已到达的音频
+            inbox: asyncio.Queue = asyncio.Queue(self.max_inbox_messages)
+            receive_task = asyncio.create_task(self._receive_loop(state, inbox))
+            held_message = None
 
-            logger.info(f"🎤 开始音频流处理: {connection_id}")
+            logger.debug("🎤 开始音频流处理: %s", connection_id)
 
             while True:
+                if held_message is not None:
+                    message, held_message = held_message, None
+                else:
+                    message = await inbox.get()
+                # 每批消息只读取一次时钟
                 now = time.monotonic()
-                try:
-                    message = await asyncio.wait_for(websocket.receive(), timeout=self.recv_timeout)
-                except asyncio.TimeoutError:
-                    idle_duration = now - last_audio_activity
-                    activity_duration = now - last_activity
-
-                    if idle_duration > self.idle_timeout:
-                        await self._notify_timeout(connection_id, "长时间未检测到语音，连接已关闭")
-                        await self._safe_close(websocket, code=1001, reason="idle timeout")
-                        break
-
-                    if awaiting_pong and now - last_ping_time > self.pong_timeout:
-                        await self._notify_timeout(connection_id, "未收到心跳响应，连接已关闭")
-                        await self._safe_close(websocket, code=1011, reason="pong timeout")
-                        break
-
-                    if (not awaiting_pong) and activity_duration > self.ping_interval:
-                        await self.connection_manager.send_message(connection_id, {"type": "ping"})
-                        awaiting_pong = True
-                        last_ping_time = now
-
-                    await asyncio.sleep(self.idle_sleep)
-                    continue
-                except WebSocketDisconnect:
-                    break
-                except Exception as e:
-                    logger.error(f"处理音频数据错误 {connection_id}: {e}")
-                    await self.connection_manager.send_message(connection_id, {
-                        "type": "error",
-                        "message": f"处理音频数据错误: {str(e)}",
-                        "code": 500
-                    })
-                    await asyncio.sleep(self.idle_sleep)
-                    continue
 
+                # 接收任务不抛出 WebSocketDisconnect，断开通过消息类型判断
                 message_type = message.get("type")
                 if message_type == "websocket.disconnect":
                     break
@@ -188,29 +196,59 @@ class WebSocketHandler:
                 text_data = message.get("text")
 
                 if binary_data is not None:
-                    samples = np.frombuffer(binary_data, dtype=np.float32)
-                    if samples.size == 0:
+                    # 合并队列中已到达的连续音频消息，整批只做一次 VAD 和缓冲处理；
+                    # 遇到非音频消息时留到下一轮处理
+                    chunks = [binary_data] if self._valid_audio(binary_data) else []
+                    while not inbox.empty():
+                        next_message = inbox.get_nowait()
+                        next_data = next_message.get("bytes")
+                        if next_message.get("type") != "websocket.receive" or next_data is None:
+                            held_message = next_message
+                            break
+                        if self._valid_audio(next_data):
+                            chunks.append(next_data)
+                    if not chunks:
                         continue
+                    binary_data = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+                    # 直接以只读视图引用消息负载；仅在地址未按 4 字节对齐时复制
+                    samples = np.frombuffer(binary_data, dtype=np.float32)
+                    if samples.ctypes.data % 4:
+                        samples = samples.copy()
 
-                    audio_buffer.append(samples)
-                    last_audio_activity = time.monotonic()
-                    last_activity = last_audio_activity
-                    awaiting_pong = False
+                    if partial_enabled:
+                        audio_buffer.append(samples)
 
+                    was_started = started
                     leftover, started = self._process_vad_frames(
                         vad, samples, leftover, started, connection_id
                     )
-
-                    if started:
-                        monotonic_now = time.monotonic()
-                        if monotonic_now - last_partial_time >= self.partial_interval:
-                            partial_samples = audio_buffer.get_recent_samples(self.partial_window_seconds)
-                            if partial_samples.size > 0:
-                                await self._realtime_recognition(partial_samples, connection_id)
-                                last_partial_time = monotonic_now
-
+                    if started and not was_started:
+                        speech_start_time = now
+                        if partial_enabled:
+                            audio_buffer.resize(self.buffer_duration_seconds)
+
+                    if started and partial_enabled:
+                        # 语音太短时 SenseVoice 难以给出有效结果，跳过这次解码
+                        if (now - speech_start_time >= self.partial_min_speech_seconds and
+                                now - last_partial_time >= self.partial_interval):
+                            # 上一次实时识别仍在进行时跳过，不再创建新的识别流
+                            if partial_task is None or partial_task.done():
+                                # 后台识别，接收循环继续处理音频；
+                                # 取得的是副本，不受后续写入覆盖
+                                partial_samples = audio_buffer.get_recent_samples(
+                                    self.partial_window_seconds
+                                )
+                                if partial_samples.size > 0:
+                                    partial_task = asyncio.create_task(
+                                        self._realtime_recognition(partial_samples, state)
+                                    )
+                                    last_partial_time = now
+
+                    if partial_task is not None and not vad.empty():
+                        # 段落已结束，未完成的实时结果不能晚于最终结果发出
+                        partial_task.cancel()
                     segment_id, drained = await self._drain_vad_segments(
-                        vad, connection_id, segment_id, audio_buffer
+                        vad, state, segment_id, audio_buffer
                     )
                     if drained:
                         started = False
@@ -220,11 +258,18 @@ class WebSocketHandler:
                     continue
 
                 if text_data is not None:
-                    last_activity = time.monotonic()
+                    # 空闲时最常见的 pong/heartbeat 短消息不做完整 JSON 解析
+                    if len(text_data) < _SHORT_CONTROL_MAX_LEN:
+                        if '"type":"pong"' in text_data:
+                            # 接收任务收到时已清除 awaiting_pong
+                            continue
+                        if '"type":"heartbeat"' in text_data:
+                            continue
+
                     msg_type, payload = self._parse_control_message(text_data, connection_id)
 
                     if msg_type == "pong":
-                        awaiting_pong = False
+                        state.awaiting_pong = False
                         continue
 
                     if msg_type in {"heartbeat", "status"}:
@@ -232,12 +277,21 @@ class WebSocketHandler:
 
                     if msg_type == "config" and payload:
                         # 允许连接期间动态更新设置
-                        self.connection_manager.set_connection_config(connection_id, payload)
+                        state.config = payload
+                        partial_enabled = bool(payload.get("partial", True))
+                        if not partial_enabled:
+                            audio_buffer.clear()
+                            audio_buffer.resize(self.preroll_seconds)
+                        elif started:
+                            # 语音进行中重新开启实时识别，缓冲区需容纳完整时长
+                            audio_buffer.resize(self.buffer_duration_seconds)
                         continue
 
                     if msg_type == "done":
+                        if partial_task is not None and not vad.empty():
+                            partial_task.cancel()
                         segment_id, drained = await self._drain_vad_segments(
-                            vad, connection_id, segment_id, audio_buffer
+                            vad, state, segment_id, audio_buffer
                         )
                         if drained:
                             started = False
@@ -246,15 +300,61 @@ class WebSocketHandler:
                         continue
 
                     if msg_type is not None:
-                        logger.info(f"收到控制消息 {connection_id}: {msg_type}")
+                        logger.info("收到控制消息 %s: %s", connection_id, msg_type)
                     continue
 
         except WebSocketDisconnect:
-            logger.info(f"🔌 WebSocket连接断开: {connection_id}")
+            logger.info("🔌 WebSocket连接断开: %s", connection_id)
         except Exception as e:
-            logger.error(f"WebSocket 连接错误 {connection_id}: {e}")
+            logger.error("WebSocket 连接错误 %s: %s", connection_id, e)
         finally:
-            self.connection_manager.disconnect(connection_id)
+            if heartbeat_task is not None:
+                heartbeat_task.cancel()
+            if receive_task is not None:
+                receive_task.cancel()
+            if partial_task is not None:
+                partial_task.cancel()
+            # 先断开连接，VAD 重置失败时也不会遗留连接状态和发送任务
+            if state is not None:
+                self.connection_manager.disconnect(state)
+            if vad is not None:
+                self.sense_voice_service.release_vad_instance(vad)
+
+    @staticmethod
+    def _valid_audio(data: bytes) -> bool:
+        """音频数据非空且长度为 float32 的整数倍"""
+        return bool(data) and len(data) % 4 == 0
+
+    @staticmethod
+    async def _receive_loop(state: ConnectionState, inbox: asyncio.Queue):
+        """持续接收消息放入队列，连接断开后放入断开消息并退出
+
+        活动时间在收到消息时记录：处理循环等待最终识别时消息会在队列中积压，
+        心跳任务不能据此误判连接超时
+        """
+        websocket = state.websocket
+        try:
+            while True:
+                message = await websocket.receive()
+                now = time.monotonic()
+                state.last_activity = now
+                if message.get("bytes") is not None:
+                    state.last_audio_activity = now
+                    state.awaiting_pong = False
+                else:
+                    text_data = message.get("text")
+                    if text_data is not None and '"type":"pong"' in text_data:
+                        state.awaiting_pong = False
+                await inbox.put(message)
+                if message.get("type") == "websocket.disconnect":
+                    return
+        except asyncio.CancelledError:
+            raise
+        except WebSocketDisconnect:
+            await inbox.put({"type": "websocket.disconnect"})
+        except Exception as e:
+            logger.warning("接收消息失败，按断开处理: %s", e)
+            await inbox.put({"type": "websocket.disconnect"})
 
     def _process_vad_frames(
         self,
@@ -266,106 +366,147 @@ class WebSocketHandler:
     ):
         """仅处理新增音频，避免重复扫描整个缓冲区"""
         if leftover.size > 0:
-            working = np.concatenate((leftover, samples))
+            total = leftover.size + samples.size
+            if total > self._vad_scratch.shape[0]:
+                self._vad_scratch = np.empty(max(total, 2 * self._vad_scratch.shape[0]), dtype=np.float32)
+            working = self._vad_scratch[:total]
+            working[:leftover.size] = leftover
+            working[leftover.size:] = samples
         else:
             working = samples
 
         window_size = self.sense_voice_service.window_size
         if working.shape[0] < window_size:
-            return working, started
+            # 复制不足一个窗口的尾部，避免视图一直引用整条 WebSocket 消息
+            return working.copy(), started
 
+        # 提前取出绑定方法，避免循环内重复查找属性
+        accept_waveform = vad.accept_waveform
+
+        # 一次 reshape 得到 (窗口数, window_size) 的视图，逐行送入 VAD
         processed = (working.shape[0] // window_size) * window_size
-        for index in range(0, processed, window_size):
-            frame = working[index : index + window_size]
-            vad.accept_waveform(frame)
-            if not started and vad.is_speech_detected():
-                started = True
-                logger.info(f"🎯 检测到语音开始: {connection_id}")
-
-        remaining = working[processed:]
+        for frame in working[:processed].reshape(-1, window_size):
+            accept_waveform(frame)
+
+        # 每条消息只检查一次语音状态，而不是每个窗口都跨越一次 C++ 调用
+        if not started and vad.is_speech_detected():
+            started = True
+            logger.debug("🎯 检测到语音开始: %s", connection_id)
+
+        # 返回尾部副本，暂存区可在下一次调用时复用
+        remaining = working[processed:].copy()
         return remaining, started
 
     async def _drain_vad_segments(
         self,
         vad,
-        connection_id: str,
+        state: ConnectionState,
         segment_id: int,
         audio_buffer: AudioBuffer
     ):
         """VAD 检测到段落结束时触发最终识别"""
-        drained = False
+        segments = []
         while not vad.empty():
-            drained = True
-            await self._final_segment_recognition(vad, connection_id, segment_id)
-            segment_id += 1
+            segments.append(vad.front.samples)
+            vad.pop()
+
+        if not segments:
+            return segment_id, False
 
-        if drained:
-            audio_buffer.clear()
+        # 同一次取出的多个段落合并为一次批量解码
+        await self._final_segment_recognition(segments, state, segment_id)
+        audio_buffer.clear()
+        audio_buffer.resize(self.preroll_seconds)
 
-        return segment_id, drained
+        return segment_id + len(segments), True
 
     def _parse_control_message(self, text_data: str, connection_id: str):
         try:
-            payload = json.loads(text_data)
-        except json.JSONDecodeError:
-            logger.warning(f"无法解析控制消息 {connection_id}: {text_data}")
+            payload = orjson.loads(text_data)
+        except orjson.JSONDecodeError:
+            logger.warning("无法解析控制消息 %s: %s", connection_id, text_data)
             return None, None
 
         return payload.get("type"), payload
 
-    async def _notify_timeout(self, connection_id: str, message: str):
-        await self.connection_manager.send_message(connection_id, {
+    async def _heartbeat_loop(self, state: ConnectionState):
+        """定期发送心跳并检测空闲/心跳超时"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            now = time.monotonic()
+
+            if now - state.last_audio_activity > self.idle_timeout:
+                await self._notify_timeout(state, "长时间未检测到语音，连接已关闭")
+                await self._safe_close(state, code=1001, reason="idle timeout")
+                return
+
+            if state.awaiting_pong and now - state.last_ping_time > self.pong_timeout:
+                await self._notify_timeout(state, "未收到心跳响应，连接已关闭")
+                await self._safe_close(state, code=1011, reason="pong timeout")
+                return
+
+            if (not state.awaiting_pong) and now - state.last_activity > self.ping_interval:
+                await self.connection_manager.send_ping(state)
+                state.awaiting_pong = True
+                state.last_ping_time = now
+
+    async def _notify_timeout(self, state: ConnectionState, message: str):
+        await self.connection_manager.send_message(state, {
             "type": "timeout",
             "message": message,
             "timestamp": time.time()
         })
 
-    async def _safe_close(self, websocket: WebSocket, code: int, reason: str):
+    async def _safe_close(self, state: ConnectionState, code: int, reason: str):
+        # 先发出队列中的通知消息，再关闭连接
+        await self.connection_manager.flush(state)
         try:
-            await websocket.close(code=code, reason=reason)
+            await state.websocket.close(code=code, reason=reason)
         except Exception:
             pass
 
-    async def _realtime_recognition(self, buffer: np.ndarray, connection_id: str):
+    async def _realtime_recognition(self, buffer: np.ndarray, state: ConnectionState):
         """实时识别处理"""
         try:
-            stream = self.sense_voice_service.recognizer.create_stream()
-            stream.accept_waveform(self.sense_voice_service.sample_rate, buffer)
-            self.sense_voice_service.recognizer.decode_stream(stream)
-            text = stream.result.text.strip()
-
-            if text:
-                logger.info(f"📝 实时识别结果 {connection_id}: {text}")
-                await self.connection_manager.send_message(connection_id, {
-                    "type": "partial",
-                    "text": text,
-                    "timestamp": time.time(),
-                    "confidence": 0.95  # SenseVoice 暂不支持置信度
-                })
+            # 与其他连接的实时识别合并批量解码，在线程池中执行
+            text = await self.sense_voice_service.submit_partial(buffer)
+        except RuntimeError as e:
+            logger.error("实时识别错误 %s: %s", state.connection_id, e)
+            return
+        except Exception:
+            # 后台任务的结果不会被读取，其他异常必须在此记录，否则会被静默丢弃
+            logger.exception("实时识别异常 %s", state.connection_id)
+            return
 
-        except Exception as e:
-            logger.error(f"实时识别错误 {connection_id}: {e}")
+        if text:
+            # 实时结果每个连接每秒数条，日志关闭时连参数打包也省去
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("📝 实时识别结果 %s: %s", state.connection_id, text)
+            await self.connection_manager.send_text(
+                state,
+                _PARTIAL_TEMPLATE % (time.time(), orjson.dumps(text).decode()),
+                kind="partial"
+            )
 
-    async def _final_segment_recognition(self, vad, connection_id: str, segment_id: int):
-        """段落结束识别处理"""
+    async def _final_segment_recognition(self, segments: list, state: ConnectionState, segment_id: int):
+        """段落结束识别处理，segment_id 为第一个段落的编号"""
         try:
-            segment_samples = vad.front.samples
-            stream = self.sense_voice_service.recognizer.create_stream()
-            stream.accept_waveform(self.sense_voice_service.sample_rate, segment_samples)
+            loop = asyncio.get_running_loop()
+            texts = await loop.run_in_executor(
+                self.sense_voice_service.executor,
+                self.sense_voice_service.decode_batch,
+                segments
+            )
+        except RuntimeError as e:
+            logger.error("段落识别错误 %s: %s", state.connection_id, e)
+            return
 
-            vad.pop()
-            self.sense_voice_service.recognizer.decode_stream(stream)
-            text = stream.result.text.strip()
-
-            if text:
-                logger.info(f"✅ 最终识别结果 {connection_id} [段落{segment_id}]: {text}")
-                await self.connection_manager.send_message(connection_id, {
-                    "type": "final",
-                    "text": text,
-                    "timestamp": time.time(),
-                    "confidence": 0.98,  # SenseVoice 暂不支持置信度
-                    "segment_id": segment_id
-                })
+        for current_id, text in enumerate(texts, start=segment_id):
+            if not text:
+                continue
 
-        except Exception as e:
-            logger.error(f"段落识别错误 {connection_id}: {e}")
+            logger.info("✅ 最终识别结果 %s [段落%d]: %s", state.connection_id, current_id, text)
+            await self.connection_manager.send_text(
+                state,
+                _FINAL_TEMPLATE % (current_id, time.time(), orjson.dumps(text).decode())
+            )
@@ -3,55 +3,164 @@
 WebSocket 连接管理器
 管理所有WebSocket连接的注册、断开和消息发送
 """
-import json
+import asyncio
 import logging
-from typing import Dict
+from collections import deque
+from typing import Dict, Optional
 
+import orjson
 from fastapi import WebSocket
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 固定内容的控制消息，预先序列化
+_PING_JSON = '{"type":"ping"}'
+
+
+class _Outbox:
+    """单个连接的待发送消息队列，由独立的发送任务消费"""
+
+    __slots__ = ("pending", "ready", "idle", "writer")
+
+    def __init__(self):
+        self.pending = deque()  # (kind, data)
+        self.ready = asyncio.Event()  # 有新消息待发送
+        self.idle = asyncio.Event()  # 队列已全部发送
+        self.idle.set()
+        self.writer: Optional[asyncio.Task] = None
+
+
+class ConnectionState:
+    """单个连接的全部状态，处理过程中直接传递该对象，避免按连接ID反复查表"""
+
+    __slots__ = (
+        "connection_id",
+        "websocket",
+        "config",
+        "outbox",
+        "last_activity",
+        "last_audio_activity",
+        "last_ping_time",
+        "awaiting_pong",
+    )
+
+    def __init__(self, connection_id: str, websocket: WebSocket, now: float):
+        self.connection_id = connection_id
+        self.websocket = websocket
+        self.config: dict = {}
+        self.outbox: Optional[_Outbox] = None  # 断开后为 None
+        self.last_activity = now  # 最近一次收到任意消息
+        self.last_audio_activity = now  # 最近一次收到音频
+        self.last_ping_time = 0.0
+        self.awaiting_pong = False
+
 
 class WebSocketConnectionManager:
     """WebSocket 连接管理器"""
 
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-        self.connection_configs: Dict[str, dict] = {}
+    def __init__(self, max_pending: int = 64):
+        self.connections: Dict[str, ConnectionState] = {}
+        self.max_pending = max_pending  # 每个连接最多积压的消息数
+        # 统计周期内的连接/断开次数，由 log_stats_loop 定期汇总输出
+        self._connects = 0
+        self._disconnects = 0
 
-    async def connect(self, websocket: WebSocket, connection_id: str):
-        """接受新连接"""
+    async def connect(self, websocket: WebSocket, connection_id: str, now: float) -> ConnectionState:
+        """接受新连接，返回该连接的状态对象"""
         await websocket.accept()
-        self.active_connections[connection_id] = websocket
-        logger.info(f"新连接: {connection_id}, 当前连接数: {len(self.active_connections)}")
+        state = ConnectionState(connection_id, websocket, now)
+        state.outbox = _Outbox()
+        state.outbox.writer = asyncio.create_task(self._writer(state, state.outbox))
+        self.connections[connection_id] = state
+        self._connects += 1
+        logger.debug("新连接: %s, 当前连接数: %d", connection_id, len(self.connections))
+        return state
 
-    def disconnect(self, connection_id: str):
+    def disconnect(self, state: ConnectionState):
         """断开连接"""
-        if connection_id in self.active_connections:
-            del self.active_connections[connection_id]
-        if connection_id in self.connection_configs:
-            del self.connection_configs[connection_id]
-        logger.info(f"连接断开: {connection_id}, 当前连接数: {len(self.active_connections)}")
+        if self.connections.pop(state.connection_id, None) is not None:
+            self._disconnects += 1
+        outbox = state.outbox
+        if outbox is not None:
+            state.outbox = None
+            outbox.idle.set()
+            outbox.writer.cancel()
+        logger.debug("连接断开: %s, 当前连接数: %d", state.connection_id, len(self.connections))
 
-    async def send_message(self, connection_id: str, message: dict):
+    async def log_stats_loop(self, interval: float = 5.0):
+        """定期汇总输出连接统计，代替逐个连接的日志"""
+        while True:
+            await asyncio.sleep(interval)
+            if self._connects or self._disconnects:
+                logger.info(
+                    "最近 %.0f 秒: 新连接 %d, 断开 %d, 当前连接数: %d",
+                    interval, self._connects, self._disconnects, len(self.connections)
+                )
+                self._connects = 0
+                self._disconnects = 0
+
+    async def send_message(self, state: ConnectionState, message: dict):
         """发送消息到指定连接"""
-        if connection_id in self.active_connections:
-            websocket = self.active_connections[connection_id]
+        # orjson 与 ensure_ascii=False 一样直接输出 UTF-8，客户端仍按文本帧接收
+        await self.send_text(state, orjson.dumps(message).decode())
+
+    async def send_text(self, state: ConnectionState, data: str, kind: str = ""):
+        """将已序列化的JSON文本放入连接的发送队列
+
+        kind 为 "partial" 的实时结果可被后续实时结果替换，队列已满时直接丢弃；
+        其他消息始终保留
+        """
+        outbox = state.outbox
+        if outbox is None:
+            return
+
+        pending = outbox.pending
+        if kind == "partial":
+            if pending and pending[-1][0] == "partial":
+                # 尚未发出的旧实时结果已过时，直接替换
+                pending[-1] = (kind, data)
+                return
+            if len(pending) >= self.max_pending:
+                return
+
+        pending.append((kind, data))
+        outbox.idle.clear()
+        outbox.ready.set()
+
+    async def flush(self, state: ConnectionState, timeout: float = 1.0):
+        """等待发送队列中的消息发送完毕"""
+        outbox = state.outbox
+        if outbox is None:
+            return
+        try:
+            await asyncio.wait_for(outbox.idle.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _writer(self, state: ConnectionState, outbox: _Outbox):
+        """发送任务：按顺序发送队列中的消息，网络阻塞不影响音频接收"""
+        pending = outbox.pending
+        websocket = state.websocket
+        while True:
+            if not pending:
+                outbox.idle.set()
+                outbox.ready.clear()
+                await outbox.ready.wait()
+                continue
+
+            _, data = pending.popleft()
             try:
-                await websocket.send_text(json.dumps(message, ensure_ascii=False))
+                await websocket.send_text(data)
             except Exception as e:
-                logger.error(f"发送消息失败 {connection_id}: {e}")
-                self.disconnect(connection_id)
+                logger.error("发送消息失败 %s: %s", state.connection_id, e)
+                self.disconnect(state)
+                return
+
+    async def send_ping(self, state: ConnectionState):
+        """发送心跳消息，跳过序列化"""
+        await self.send_text(state, _PING_JSON)
 
     def get_connection_count(self) -> int:
         """获取当前活跃连接数"""
-        return len(self.active_connections)
-
-    def set_connection_config(self, connection_id: str, config: dict):
-        """设置连接配置"""
-        self.connection_configs[connection_id] = config
-
-    def get_connection_config(self, connection_id: str) -> dict:
-        """获取连接配置"""
-        return self.connection_configs.get(connection_id, {})
\ No newline at end of file
+        return len(self.connections)
@@ -25,6 +25,7 @@ echo ""
 uvicorn main:app \
     --host 0.0.0.0 \
     --port 8891 \
+    --loop uvloop \
     --reload \
     --reload-dir static \
     --reload-dir . \
@@ -54,10 +54,15 @@ echo ""
 echo "按 Ctrl+C 停止服务"
 echo "=========================="
 
-# 使用 uvicorn 启动服务
-uvicorn main:app \
-    --host 0.0.0.0 \
-    --port $PORT \
-    --reload \
+# 使用 gunicorn 多进程启动服务
+# --preload 在主进程中加载一次模型，worker fork 后共享模型内存
+# 每个 worker 的解码线程池按 CPU 核数 / WEB_CONCURRENCY 分配，默认单进程使用全部核
+WORKERS=${WORKERS:-1}
+export WEB_CONCURRENCY=$WORKERS
+gunicorn main:app \
+    -k uvicorn.workers.UvicornWorker \
+    --preload \
+    -w $WORKERS \
+    --bind 0.0.0.0:$PORT \
     --log-level info \
-    --access-log
\ No newline at end of file
+    --access-logfile -
\ No newline at end of file
@@ -74,7 +74,8 @@ def test_sense_voice_service():
     print("\n🎤 测试 SenseVoice 服务...")
 
     try:
-        from main import SenseVoiceService
+        # 直接从服务模块导入，导入 main 会再加载一次模型
+        from server.sensevoice_service import SenseVoiceService
         service = SenseVoiceService()
         print("✅ SenseVoice 服务初始化成功")
         return True